@@ -1,19 +1,36 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.tools import WikipediaQueryRun
-from langchain.agents import initialize_agent, AgentType
-from langchain.callbacks import StreamlitCallbackHandler
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import asyncio
+import httpx
+import json
+import time
+import numpy as np
+import faiss
 from PIL import Image
 from io import BytesIO
 import base64
+import logging
+import hashlib
+import re
 
 # Load environment variables
 load_dotenv()
 
+# Keep LangChain's chain tracing out of stdout
+logging.getLogger("langchain").setLevel(logging.WARNING)
+
 # Set page configuration
 st.set_page_config(
     page_title="Fake News Detector",
@@ -121,112 +138,482 @@ with st.sidebar:
     4. Results show why content might be fake or confirmed as real
     """)
 
+# Instructions live once in the system message; tool results come back as
+# structured tool messages, so no ReAct scaffolding is needed in the prompt
+AGENT_SYSTEM_PROMPT = """You are a meticulous fact-checker with access to web search and Wikipedia.
+Verify whether the news content you are given is genuine or fake:
+search for at least 3 credible sources, compare them with the content, and look for inconsistencies, exaggerations, or fabricated elements.
+When you need multiple independent pieces of information, call all the relevant tools in a single response so they run in parallel.
+
+Format your response with:
+- Verdict: REAL, FAKE, or UNCERTAIN
+- Summary of findings from your search
+- Explanation of your verdict
+- List of red flags if any were found"""
+
+agent_prompt = ChatPromptTemplate.from_messages([
+    ("system", AGENT_SYSTEM_PROMPT),
+    ("human", "{input}"),
+    MessagesPlaceholder("agent_scratchpad"),
+])
+
+# Per-request part of the verification prompt, compiled once
+VERIFY_PROMPT = PromptTemplate.from_template("NEWS CONTENT: {content}{extra_context}")
+
+# Upper bound on agent runs in flight when verifying a list of claims
+MAX_CLAIM_CONCURRENCY = 5
+
+# Matches "Verdict: FAKE", "**Verdict:** REAL", "VERDICT - UNCERTAIN", ...
+VERDICT_RE = re.compile(r"\bVERDICT\b[\s:*\-]*(FAKE|REAL|UNCERTAIN)\b", re.IGNORECASE)
+
+VERDICT_CSS = {
+    "FAKE": "fake-tag",
+    "REAL": "real-tag",
+    "UNCERTAIN": "uncertain-tag",
+}
+
+def extract_verdict(response):
+    match = VERDICT_RE.search(response)
+    return match.group(1).upper() if match else "UNCERTAIN"
+
+# Cached verification responses expire after a day; news moves on
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+# Callback handler that renders the LLM's answer as it is generated. Each
+# update re-sends the whole text, so redraws are throttled to one per
+# interval; the caller renders the final response once the run is done.
+class TokenStreamHandler(BaseCallbackHandler):
+    def __init__(self, container, interval=0.05):
+        self.container = container
+        self.interval = interval
+        self.text = ""
+        self.last_render = 0.0
+    
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        # Only show the text of the latest LLM turn (the final answer)
+        self.text = ""
+    
+    def on_llm_new_token(self, token, **kwargs):
+        if token:
+            self.text += token
+            now = time.monotonic()
+            if now - self.last_render >= self.interval:
+                self.container.markdown(self.text)
+                self.last_render = now
+
+# Callback handler that shows one collapsible status per tool run. Runs are
+# tracked by run_id, so every call of a parallel tool-calling turn is shown.
+class ToolStatusHandler(BaseCallbackHandler):
+    def __init__(self, container):
+        self.container = container
+        self.statuses = {}
+    
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name", "tool")
+        self.statuses[run_id] = self.container.status(f"**{name}**: {input_str}", expanded=False)
+    
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        status = self.statuses.pop(run_id, None)
+        if status is not None:
+            status.text(str(output))
+            status.update(state="complete")
+    
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        status = self.statuses.pop(run_id, None)
+        if status is not None:
+            status.text(str(error))
+            status.update(state="error")
+
+# Semantic cache of verification responses, keyed on the claim's embedding.
+# The index and its entries are persisted together in one .npz file.
+class SemanticCache:
+    def __init__(self, path, threshold=0.15, ttl=RESPONSE_CACHE_TTL):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.index = None
+        self.entries = []
+        
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.index = faiss.deserialize_index(data["index"])
+                    self.entries = json.loads(str(data["entries"]))
+            except Exception:
+                self.index = None
+                self.entries = []
+    
+    def _is_fresh(self, entry):
+        return time.time() - entry["created"] < self.ttl
+    
+    def lookup(self, embedding):
+        with self.lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            
+            # Look past expired neighbours to the nearest fresh one
+            k = min(self.index.ntotal, 5)
+            distances, indices = self.index.search(embedding.reshape(1, -1), k)
+            for distance, i in zip(distances[0], indices[0]):
+                if distance >= self.threshold:
+                    break
+                entry = self.entries[i]
+                if self._is_fresh(entry):
+                    # Return the matched claim too, so callers can show it
+                    return entry.get("source", ""), entry["response"]
+        return None
+    
+    def add(self, embedding, source, response):
+        # Uncertain verdicts are often just "too early to tell"; don't pin them
+        if extract_verdict(response) == "UNCERTAIN":
+            return
+        
+        with self.lock:
+            if self.index is None:
+                self.index = faiss.IndexFlatL2(embedding.shape[0])
+            self._evict_expired()
+            self.index.add(embedding.reshape(1, -1))
+            self.entries.append({"source": source, "response": response, "created": time.time()})
+            
+            try:
+                # Write to a temp file and swap it in, so the index and its
+                # entries on disk always come from the same write
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(
+                        f,
+                        index=faiss.serialize_index(self.index),
+                        entries=np.array(json.dumps(self.entries))
+                    )
+                os.replace(tmp_path, self.path)
+            except Exception:
+                pass
+    
+    def _evict_expired(self):
+        keep = [i for i, entry in enumerate(self.entries) if self._is_fresh(entry)]
+        if len(keep) == len(self.entries):
+            return
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)[keep]
+        self.index = faiss.IndexFlatL2(self.index.d)
+        if keep:
+            self.index.add(vectors)
+        self.entries = [self.entries[i] for i in keep]
+
+# Embed texts for the response cache in one request; None if embedding fails
+def embed_texts(texts):
+    try:
+        embeddings = np.array(get_embedder(openai_api_key).embed_documents(texts), dtype="float32")
+    except Exception:
+        return None
+    # Normalize so squared L2 distance maps to cosine similarity
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+# Wikipedia tool with a native async path over httpx. The agent itself runs
+# synchronously, so _arun is only reached through the batch tool, where it
+# lets concurrent Wikipedia lookups share one event loop; direct calls still
+# go through the `wikipedia` library.
+class AsyncWikipediaQueryRun(WikipediaQueryRun):
+    async def _arun(self, query, run_manager=None):
+        wrapper = self.api_wrapper
+        api_url = f"https://{wrapper.lang}.wikipedia.org/w/api.php"
+        
+        # One client per lookup: its search and extract requests share the
+        # connection, but pools can't outlive the event loop of one batch
+        async with httpx.AsyncClient(
+            headers={"User-Agent": "multimodal-fake-news-detector"},
+            timeout=10
+        ) as client:
+            response = await client.get(api_url, params={
+                "action": "query",
+                "list": "search",
+                "srsearch": query[:300],
+                "srlimit": wrapper.top_k_results,
+                "format": "json"
+            })
+            titles = [result["title"] for result in response.json()["query"]["search"]]
+            if not titles:
+                return "No good Wikipedia Search Result was found"
+            
+            page_responses = await asyncio.gather(*[
+                client.get(api_url, params={
+                    "action": "query",
+                    "prop": "extracts",
+                    "exintro": 1,
+                    "explaintext": 1,
+                    "redirects": 1,
+                    "titles": title,
+                    "format": "json"
+                })
+                for title in titles
+            ])
+        
+        summaries = []
+        for title, page_response in zip(titles, page_responses):
+            for page in page_response.json()["query"]["pages"].values():
+                if page.get("extract"):
+                    summaries.append(f"Page: {title}\nSummary: {page['extract']}")
+        
+        if not summaries:
+            return "No good Wikipedia Search Result was found"
+        return "\n\n".join(summaries)[:wrapper.doc_content_chars_max]
+
+# Cached resources: built once per process and reused across Streamlit reruns
+@st.cache_resource(show_spinner=False)
+def get_llm(model, api_key, streaming=True):
+    # One client per (model, key) so connections to the API stay warm across runs
+    return ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        temperature=0,
+        streaming=streaming
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_embedder(api_key):
+    return OpenAIEmbeddings(model="text-embedding-3-small", api_key=api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache(model):
+    # One cache per model, shared by every session, so a verdict is only
+    # ever replayed for the model that produced it
+    return SemanticCache(f"semantic_cache_{model}.npz")
+
+@st.cache_resource(show_spinner=False)
+def get_search():
+    # DuckDuckGoSearchRun comes from the availability check at the top of the script
+    class TrimmedDuckDuckGoSearchRun(DuckDuckGoSearchRun):
+        # Every character returned here is re-sent on each following LLM turn
+        max_chars: int = 600
+        
+        def _run(self, query, run_manager=None):
+            return super()._run(query, run_manager=run_manager)[:self.max_chars]
+    
+    return TrimmedDuckDuckGoSearchRun(name="Search")
+
+@st.cache_resource(show_spinner=False)
+def get_wiki(wiki_only=False):
+    # Wikipedia gets a larger context budget only when it is the sole source
+    if wiki_only:
+        wiki_wrapper = WikipediaAPIWrapper(top_k_results=2, doc_content_chars_max=500)
+    else:
+        wiki_wrapper = WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=300)
+    return AsyncWikipediaQueryRun(api_wrapper=wiki_wrapper)
+
+@st.cache_resource(show_spinner=False)
+def get_agent(model, api_key):
+    # Tool-calling agent: the model can request every search in one turn
+    # instead of one ReAct round-trip per tool call
+    llm = get_llm(model, api_key).bind(parallel_tool_calls=True)
+    agent = create_openai_tools_agent(llm, TOOLS, agent_prompt)
+    
+    return AgentExecutor(
+        agent=agent,
+        tools=TOOLS,
+        handle_parsing_errors=True,
+        verbose=False
+    )
+
 # Initialize search tools
 if search_tool_available:
-    from langchain_community.tools import DuckDuckGoSearchRun
-    search = DuckDuckGoSearchRun(name="Search")
+    search = get_search()
 else:
     search = None
 
-wiki_wrapper = WikipediaAPIWrapper(top_k_results=2, doc_content_chars_max=500)
-wiki = WikipediaQueryRun(api_wrapper=wiki_wrapper)
+wiki = get_wiki(wiki_only=search is None)
+
+TOOL_MAP = {tool.name: tool for tool in (search, wiki) if tool is not None}
+
+class ToolInvocation(BaseModel):
+    name: str = Field(description=f"The name of the tool to invoke, one of: {', '.join(TOOL_MAP)}")
+    arguments: dict = Field(description='The arguments to pass to the tool, e.g. {"query": "..."}')
+
+class BatchInput(BaseModel):
+    invocations: list[ToolInvocation] = Field(description="The tool invocations to run concurrently")
+
+BATCH_CALL_TIMEOUT = 15
+
+# Run several search/wiki lookups concurrently and return all results at
+# once. Tools with a native async path share the event loop; sync-only tools
+# run on a private thread pool that is abandoned, not joined, on timeout.
+async def batch_aexec(invocations):
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=5)
+    
+    async def run_invocation(invocation):
+        if isinstance(invocation, dict):
+            invocation = ToolInvocation(**invocation)
+        tool = TOOL_MAP.get(invocation.name)
+        if tool is None:
+            return f"[{invocation.name}] {invocation.arguments}\nUnknown tool: {invocation.name}"
+        
+        # Detach from the parent run's callbacks: the callback manager would
+        # otherwise run the UI handlers off the script thread
+        config = {"callbacks": []}
+        if isinstance(tool, AsyncWikipediaQueryRun):
+            call = tool.ainvoke(invocation.arguments, config)
+        else:
+            call = loop.run_in_executor(pool, tool.invoke, invocation.arguments, config)
+        
+        try:
+            result = await asyncio.wait_for(call, timeout=BATCH_CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            result = f"Error: timed out after {BATCH_CALL_TIMEOUT}s"
+        except Exception as e:
+            result = f"Error: {type(e).__name__}: {e}"
+        return f"[{invocation.name}] {invocation.arguments}\n{result}"
+    
+    try:
+        results = await asyncio.gather(*[run_invocation(invocation) for invocation in invocations])
+    finally:
+        # asyncio.run joins the loop's default executor without a timeout,
+        # so stalled calls must never be left on it
+        pool.shutdown(wait=False, cancel_futures=True)
+    return "\n\n".join(results)
+
+def batch_exec(invocations):
+    return asyncio.run(batch_aexec(invocations))
+
+@st.cache_resource(show_spinner=False)
+def get_batch_tool():
+    return StructuredTool.from_function(
+        func=batch_exec,
+        coroutine=batch_aexec,
+        name="batch",
+        description=(
+            "Invoke multiple other tool calls simultaneously. "
+            "Use this to run several independent searches in a single step."
+        ),
+        args_schema=BatchInput
+    )
+
+batch = get_batch_tool()
+
+# Tools available to the agent; constant for the lifetime of the process
+TOOLS = [tool for tool in (search, wiki, batch) if tool is not None]
+
+# Images are analyzed in "low" detail mode, where gpt-4o sees a 512px
+# version at a flat token cost; any larger only adds upload bytes
+MAX_IMAGE_SIDE = 512
+
+# Vision call memoized on the image's content hash; the base64 payload
+# itself is excluded from Streamlit's argument hashing
+@st.cache_data(show_spinner=False)
+def analyze_image_cached(image_hash, _image_bytes, api_key):
+    llm = get_llm("gpt-4o", api_key, streaming=False)
+    
+    response = llm.invoke([
+        SystemMessage(content="You are an expert at analyzing images. Describe the key details of this image that would be relevant for fact-checking."),
+        HumanMessage(content=[
+            {"type": "text", "text": "What is shown in this image? Provide key details that would be useful for verifying if this is related to a real news event."},
+            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{_image_bytes}", "detail": "low"}}
+        ])
+    ])
+    
+    return response.content
 
 # Function to analyze image content
-def analyze_image(image_bytes):
+def analyze_image(image_bytes, image_hash):
     if not openai_api_key:
         st.error("Please provide an OpenAI API key in the sidebar or set it as an environment variable")
         return None
     
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o",
-            api_key=openai_api_key,
-            temperature=0
-        )
-        
-        response = llm.invoke([
-            SystemMessage(content="You are an expert at analyzing images. Describe the key details of this image that would be relevant for fact-checking."),
-            HumanMessage(content=[
-                {"type": "text", "text": "What is shown in this image? Provide key details that would be useful for verifying if this is related to a real news event."},
-                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_bytes}"}}
-            ])
-        ])
-        
-        return response.content
+        return analyze_image_cached(image_hash, image_bytes, openai_api_key)
     except Exception as e:
         st.error(f"Error analyzing image: {str(e)}")
         return None
 
 # Function to verify news with search results
-def verify_news(content, image_analysis=None):
+def verify_news(content, image_analysis=None, search_results=None):
     if not openai_api_key:
         st.error("Please provide an OpenAI API key in the sidebar or set it as an environment variable")
         return None, None
     
-    llm = ChatOpenAI(
-        model=model_choice,
-        api_key=openai_api_key,
-        temperature=0,
-        streaming=True
-    )
-    
-    # Add available tools
-    tools = []
-    if search is not None:
-        tools.append(search)
-    tools.append(wiki)
+    search_agent = get_agent(model_choice, openai_api_key)
     
-    search_agent = initialize_agent(
-        tools,
-        llm,
-        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-        handle_parsing_errors=True,
-        verbose=True
-    )
-    
-    # Prepare prompt based on input type
+    # Only the variable parts are substituted into the precompiled template
+    extra_context = ""
     if image_analysis:
-        prompt = f"""
-        Verify if the following content is genuine or fake news:
-        
-        NEWS CONTENT: {content}
+        extra_context = f"\n\nIMAGE ANALYSIS: {image_analysis}"
+    if search_results:
+        extra_context += f"\n\nPRELIMINARY SEARCH RESULTS: {search_results}"
+    prompt = VERIFY_PROMPT.format(content=content, extra_context=extra_context)
+    
+    return search_agent, prompt
+
+# Function to run one verification and render its thoughts, verdict and
+# streamed answer; cache_text is the text the semantic cache is keyed on
+def run_verification(search_agent, prompt, cache_text):
+    with st.container():
+        thoughts = st.container()
+        verdict_slot = st.empty()
+        stream_cb = TokenStreamHandler(st.empty())
         
-        IMAGE ANALYSIS: {image_analysis}
+        # Reuse the verdict of a near-identical claim if we have one
+        response_cache = get_response_cache(model_choice)
+        embeddings = embed_texts([cache_text])
+        cached = None
+        if embeddings is not None:
+            cached = response_cache.lookup(embeddings[0])
+        if cached is None:
+            st_cb = ToolStatusHandler(thoughts)
+            response = search_agent.invoke(
+                {"input": prompt},
+                {"callbacks": [st_cb, stream_cb]}
+            )["output"]
+            if embeddings is not None:
+                response_cache.add(embeddings[0], cache_text, response)
+        else:
+            cached_source, response = cached
+            thoughts.caption(f"Cached result for: {cached_source[:300]}")
         
-        Steps:
-        1. Search for at least 3 credible sources related to this news.
-        2. Compare the news content with what you find in these sources.
-        3. Look for inconsistencies, exaggerations, or fabricated elements.
-        4. Provide a clear verdict: REAL, FAKE, or UNCERTAIN.
-        5. Explain your reasoning in detail.
+        # Extract verdict for styling
+        verdict = extract_verdict(response)
+        verdict_slot.markdown(f"<p class='{VERDICT_CSS[verdict]}'>VERDICT: {verdict}</p>", unsafe_allow_html=True)
         
-        Format your response with:
-        - A verdict (REAL/FAKE/UNCERTAIN)
-        - Summary of findings from your search
-        - Explanation of your verdict
-        - List of red flags if any were found
-        """
+        stream_cb.container.markdown(response)
+    
+    return response
+
+# Function to verify a list of claims with bounded concurrency
+def verify_claims(claims):
+    if not openai_api_key:
+        st.error("Please provide an OpenAI API key in the sidebar or set it as an environment variable")
+        return None
+    
+    search_agent = get_agent(model_choice, openai_api_key)
+    response_cache = get_response_cache(model_choice)
+    embeddings = embed_texts(claims)
+    if embeddings is None:
+        results = [None] * len(claims)
     else:
-        prompt = f"""
-        Verify if the following content is genuine or fake news:
-        
-        NEWS CONTENT: {content}
-        
-        Steps:
-        1. Search for at least 3 credible sources related to this news.
-        2. Compare the news content with what you find in these sources.
-        3. Look for inconsistencies, exaggerations, or fabricated elements.
-        4. Provide a clear verdict: REAL, FAKE, or UNCERTAIN.
-        5. Explain your reasoning in detail.
+        results = [response_cache.lookup(embedding) for embedding in embeddings]
+    pending = [i for i, result in enumerate(results) if result is None]
+    
+    if pending:
+        inputs = [
+            {"input": VERIFY_PROMPT.format(content=claims[i], extra_context="")}
+            for i in pending
+        ]
+        outputs = search_agent.batch(
+            inputs,
+            {"max_concurrency": MAX_CLAIM_CONCURRENCY},
+            return_exceptions=True
+        )
         
-        Format your response with:
-        - A verdict (REAL/FAKE/UNCERTAIN)
-        - Summary of findings from your search
-        - Explanation of your verdict
-        - List of red flags if any were found
-        """
+        for i, output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                results[i] = (None, f"Error verifying claim: {str(output)}")
+            else:
+                results[i] = (None, output["output"])
+                if embeddings is not None:
+                    response_cache.add(embeddings[i], claims[i], output["output"])
     
-    return search_agent, prompt
+    # (cached_source, response) per claim; cached_source is None for fresh runs
+    return results
 
 # Create tabs for text and image input
 text_tab, image_tab = st.tabs(["Text Analysis", "Image Analysis"])
@@ -238,6 +625,11 @@ with text_tab:
         placeholder="Paste the news content or claim that you want to fact-check..."
     )
     
+    batch_mode = st.checkbox(
+        "Verify each blank-line separated block as a separate claim",
+        help="Claims are checked independently and concurrently, without the surrounding text"
+    )
+    
     verify_text_button = st.button("Verify Text", type="primary", use_container_width=True)
     
     if verify_text_button and news_text:
@@ -245,24 +637,33 @@ with text_tab:
         if not search_tool_available:
             st.warning("Search functionality is limited. Install duckduckgo-search package for better results.")
             
-        search_agent, prompt = verify_news(news_text)
+        # In batch mode, several claims are verified concurrently
+        claims = []
+        if batch_mode:
+            claims = [claim.strip() for claim in news_text.split("\n\n") if claim.strip()]
         
-        if search_agent and prompt:
-            with st.spinner("Analyzing the news content..."):
-                st.subheader("Analysis Results")
-                with st.container():
-                    st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
-                    response = search_agent.run(prompt, callbacks=[st_cb])
-                    
-                    # Extract verdict for styling
-                    if "FAKE" in response.upper().split():
-                        st.markdown("<p class='fake-tag'>VERDICT: FAKE</p>", unsafe_allow_html=True)
-                    elif "REAL" in response.upper().split():
-                        st.markdown("<p class='real-tag'>VERDICT: REAL</p>", unsafe_allow_html=True)
-                    else:
-                        st.markdown("<p class='uncertain-tag'>VERDICT: UNCERTAIN</p>", unsafe_allow_html=True)
-                    
-                    st.write(response)
+        if len(claims) > 1:
+            with st.spinner(f"Analyzing {len(claims)} claims..."):
+                results = verify_claims(claims)
+                
+                if results is not None:
+                    st.subheader("Analysis Results")
+                    for claim, (cached_source, response) in zip(claims, results):
+                        # Extract verdict for styling
+                        verdict = extract_verdict(response)
+                        with st.expander(f"{verdict}: {claim[:100]}"):
+                            if cached_source is not None:
+                                st.caption(f"Cached result for: {cached_source[:300]}")
+                            st.markdown(f"<p class='{VERDICT_CSS[verdict]}'>VERDICT: {verdict}</p>", unsafe_allow_html=True)
+                            st.markdown(response)
+        
+        else:
+            search_agent, prompt = verify_news(news_text)
+            
+            if search_agent and prompt:
+                with st.spinner("Analyzing the news content..."):
+                    st.subheader("Analysis Results")
+                    run_verification(search_agent, prompt, news_text)
 
 with image_tab:
     col1, col2 = st.columns([1, 1])
@@ -270,7 +671,9 @@ with image_tab:
     with col1:
         uploaded_image = st.file_uploader("Upload an image to analyze:", type=["jpg", "jpeg", "png"])
         if uploaded_image:
-            image = Image.open(uploaded_image)
+            # Decode the upload once and reuse it for preview and encoding
+            raw_image = uploaded_image.getvalue()
+            image = Image.open(BytesIO(raw_image))
             st.image(image, caption="Uploaded Image", use_column_width=True)
     
     with col2:
@@ -284,13 +687,36 @@ with image_tab:
     
     if verify_image_button and uploaded_image:
         with st.spinner("Processing image..."):
-            # Convert image to base64
-            image_bytes = BytesIO()
-            Image.open(uploaded_image).save(image_bytes, format="JPEG")
-            image_base64 = base64.b64encode(image_bytes.getvalue()).decode("utf-8")
+            # Convert image to base64, re-encoding only when the upload isn't
+            # already a small enough JPEG
+            if uploaded_image.type == "image/jpeg" and max(image.size) <= MAX_IMAGE_SIDE:
+                jpeg_bytes = raw_image
+            else:
+                image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+                image_bytes = BytesIO()
+                image.convert("RGB").save(image_bytes, format="JPEG", quality=85, optimize=True)
+                jpeg_bytes = image_bytes.getvalue()
+            image_base64 = base64.b64encode(jpeg_bytes).decode("utf-8")
+            image_hash = hashlib.blake2b(raw_image).hexdigest()
+            
+            # Search the provided context in the background while the image
+            # is being analyzed; the two are independent
+            context_executor = ThreadPoolExecutor(max_workers=1)
+            context_future = None
+            if image_context and search is not None:
+                context_future = context_executor.submit(search.run, image_context)
             
             # Analyze image content
-            image_analysis = analyze_image(image_base64)
+            image_analysis = analyze_image(image_base64, image_hash)
+            
+            # Nothing to verify if the analysis failed, so don't wait on the search
+            context_hits = None
+            if context_future is not None and image_analysis:
+                try:
+                    context_hits = context_future.result(timeout=15)
+                except Exception:
+                    context_hits = None
+            context_executor.shutdown(wait=False, cancel_futures=True)
             
             if image_analysis:
                 st.subheader("Image Analysis")
@@ -300,23 +726,11 @@ with image_tab:
                 # Combine image analysis with any provided context
                 content_to_verify = f"Image context: {image_context}\n\nImage appears to show: {image_analysis}"
                 
-                search_agent, prompt = verify_news(content_to_verify, image_analysis)
+                search_agent, prompt = verify_news(content_to_verify, image_analysis, context_hits)
                 
                 if search_agent and prompt:
                     st.subheader("Verification Results")
-                    with st.container():
-                        st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
-                        response = search_agent.run(prompt, callbacks=[st_cb])
-                        
-                        # Extract verdict for styling
-                        if "FAKE" in response.upper().split():
-                            st.markdown("<p class='fake-tag'>VERDICT: FAKE</p>", unsafe_allow_html=True)
-                        elif "REAL" in response.upper().split():
-                            st.markdown("<p class='real-tag'>VERDICT: REAL</p>", unsafe_allow_html=True)
-                        else:
-                            st.markdown("<p class='uncertain-tag'>VERDICT: UNCERTAIN</p>", unsafe_allow_html=True)
-                        
-                        st.write(response)
+                    run_verification(search_agent, prompt, content_to_verify)
 
 # App footer
 st.divider()